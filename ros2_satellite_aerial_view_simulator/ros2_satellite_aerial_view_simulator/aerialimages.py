@@ -1,4 +1,5 @@
 import math
+from types import MappingProxyType
 
 import numpy as np
 
@@ -20,6 +21,44 @@ from aerialviewgenerator.aerialview import AerialView
 from aerialviewgenerator.uavphysics import UAVPhysics
 
 class AerialImagesPublisher(Node):
+    _DEFAULT_CTRL_PARAMS = MappingProxyType({
+                  # Position P gains
+                  "Px"    : 1.0, "Py"    : 1.0, "Pz"    : 1.0,
+
+                  # Velocity P-D gains
+                  "Pxdot" : 5.0, "Dxdot" : 0.5, "Ixdot" : 5.0,
+
+                  "Pydot" : 5.0, "Dydot" : 0.5, "Iydot" : 5.0,
+
+                  "Pzdot" : 4.0, "Dzdot" : 0.5, "Izdot" : 5.0,
+
+                  # Attitude P gains
+                  "Pphi"   : 8.0, "Ptheta" : 8.0, "Ppsi"   : 1.5,
+
+                  # Rate P-D gains
+                  "Pp" : 1.5, "Dp" : 0.04,
+
+                  "Pq" : 1.5, "Dq" : 0.04,
+
+                  "Pr" : 1.0, "Dr" : 0.1,
+
+                  # Max Velocities (x,y,z) [m/s]
+                  "uMax" : 15.0, "vMax" : 15.0, "wMax" : 5.0,
+
+                  "saturateVel_separately" : True,
+
+                  # Max tilt [degrees]
+                  "tiltMax" : 50.0,
+
+                  # Max Rate [degrees/s]
+                  "pMax" : 200.0, "qMax" : 200.0, "rMax" : 150.0,
+
+                  # Minimum velocity for yaw follow to kick in [m/s]
+                  "minTotalVel_YawFollow" : 0.1,
+
+                  "useIntegral" : True    # Include integral gains in linear velocity control
+                  })
+
     def __init__(self):
         super().__init__('aerial_images')
         
@@ -56,51 +95,16 @@ class AerialImagesPublisher(Node):
         self.child_frame = self.get_parameter('child_frame').value
 
 
-        ctrl_params = {
-                      # Position P gains
-                      "Px"    : 1.0, "Py"    : 1.0, "Pz"    : 1.0,
-
-                      # Velocity P-D gains
-                      "Pxdot" : 5.0, "Dxdot" : 0.5, "Ixdot" : 5.0,
-
-                      "Pydot" : 5.0, "Dydot" : 0.5, "Iydot" : 5.0,
-
-                      "Pzdot" : 4.0, "Dzdot" : 0.5, "Izdot" : 5.0,
-
-                      # Attitude P gains
-                      "Pphi"   : 8.0, "Ptheta" : 8.0, "Ppsi"   : 1.5,
-
-                      # Rate P-D gains
-                      "Pp" : 1.5, "Dp" : 0.04,
-
-                      "Pq" : 1.5, "Dq" : 0.04,
-
-                      "Pr" : 1.0, "Dr" : 0.1,
-
-                      # Max Velocities (x,y,z) [m/s]
-                      "uMax" : 15.0, "vMax" : 15.0, "wMax" : 5.0,
-
-                      "saturateVel_separately" : True,
-
-                      # Max tilt [degrees]
-                      "tiltMax" : 50.0,
-
-                      # Max Rate [degrees/s]
-                      "pMax" : 200.0, "qMax" : 200.0, "rMax" : 150.0,
-
-                      # Minimum velocity for yaw follow to kick in [m/s]
-                      "minTotalVel_YawFollow" : 0.1,
-
-                      "useIntegral" : True    # Include integral gains in linear velocity control
-                      }
-        
-        for k,v in ctrl_params.copy().items():
+        ctrl_params = {}
+        for k,v in self._DEFAULT_CTRL_PARAMS.items():
             self.declare_parameter(k, v)
             ctrl_params[k] = self.get_parameter(k).value
         
         self.avg = AerialView(zoom=20, baseurl=baseurl)
         self.uav = UAVPhysics(z0=z_init, ctrlType="xyz_vel", ctrlParams=ctrl_params)
         self.twist_linear = [0.0,0.0,0.0]
+        self._zero3 = np.zeros(3) # desired position is unused with ctrlType="xyz_vel"
+        self._zero3.flags.writeable = False
         self.currPos = [0.0,0.0,z_init]
         self.currLatLon = [lat0, lon0]
 
@@ -124,7 +128,7 @@ class AerialImagesPublisher(Node):
  
 
     def on_img_timer(self):
-        nextPos = np.asarray(self.uav.update([0]*3, self.twist_linear, self.delta_t))
+        nextPos = np.asarray(self.uav.update(self._zero3, self.twist_linear, self.delta_t))
         diffPos = nextPos - self.currPos
         self.currPos = nextPos
         bearing = math.degrees(math.atan2(-diffPos[1],diffPos[0]))+90
@@ -135,24 +139,27 @@ class AerialImagesPublisher(Node):
 
         img = self.avg.getAerialImage(self.currLatLon[0], self.currLatLon[1], self.bearing, self.currPos[2], self.fov, output_size=self.output_img_size)
 
-        img_np = np.asarray(img.convert('RGB'))
+        if img.mode != 'RGB':
+            img = img.convert('RGB') # convert always copies, even when the mode already matches
+        img_np = np.asarray(img)
 
         img_msg = self.cv_bridge.cv2_to_imgmsg(img_np, encoding='rgb8')
         img_msg.header.frame_id = self.child_frame
-        img_msg.header.stamp = self.get_clock().now().to_msg()
-        self.fake_depth.header.stamp = img_msg.header.stamp
+        stamp = self.get_clock().now().to_msg()
+        img_msg.header.stamp = stamp
+        self.fake_depth.header.stamp = stamp
         self.rgb_pub.publish(img_msg)
         self.depth_pub.publish(self.fake_depth)
 
-        self.publish_transform(*self.currPos, parent=self.parent_frame, child=self.child_frame)
+        self.publish_transform(*self.currPos, parent=self.parent_frame, child=self.child_frame, stamp=stamp)
         self.get_logger().info(f'Current position: {-self.currPos[1],-self.currPos[0],self.currPos[2]}')
         self.get_logger().info(f'Current lat/lon: {lat, lon}')
 
 
-    def publish_transform(self, x, y, z, parent="map", child="flying_sensor"):
+    def publish_transform(self, x, y, z, parent="map", child="flying_sensor", stamp=None):
         t = TransformStamped()
 
-        t.header.stamp = self.get_clock().now().to_msg()
+        t.header.stamp = stamp if stamp is not None else self.get_clock().now().to_msg()
         t.header.frame_id = parent
         t.child_frame_id = child
 